@@ -13,8 +13,18 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("Missing DATABASE_URL in .env")
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+DB_POOL_TIMEOUT_SECONDS = 30
+DB_POOL_RECYCLE_SECONDS = 1800
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "1") == "1"
+
 engine = create_engine(
     DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
     pool_pre_ping=True,
 )
 
@@ -27,10 +37,14 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
-# Purpose: Provide one SQLAlchemy session per API request.
+# Purpose: Provide one SQLAlchemy session per API request, committed on success.
 def get_db() -> Generator:
     db = SessionLocal()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
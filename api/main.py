@@ -1,57 +1,72 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
+from anyio import to_thread
 from fastapi import FastAPI
-from sqlalchemy import select
+from sqlalchemy import insert
 
-from api.db import Base, SessionLocal, engine
+from api.db import (
+    DB_AUTO_CREATE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    Base,
+    SessionLocal,
+    engine,
+)
 from api.models import Event
 from api.routers.checkin import router as checkin_router
 from api.routers.events import router as events_router
 from api.routers.registration import router as registration_router
 
-app = FastAPI(title="Event Bot API")
+SEED_EVENTS = [
+    {
+        "id": "evt_001",
+        "title": "NUS-ISS Career Sharing",
+        "start_time": datetime(2026, 3, 5, 19, 0, tzinfo=timezone.utc),
+        "location": "LT19",
+        "capacity": 100,
+        "status": "OPEN",
+    },
+    {
+        "id": "evt_002",
+        "title": "Python FastAPI Workshop",
+        "start_time": datetime(2026, 3, 10, 14, 0, tzinfo=timezone.utc),
+        "location": "Online",
+        "capacity": 200,
+        "status": "OPEN",
+    },
+]
 
 
-# Purpose: Seed baseline events when the events table is empty.
+# Purpose: Insert baseline events, skipping any that already exist.
 def seed_events() -> None:
     db = SessionLocal()
     try:
-        has_any_event = db.scalar(select(Event.id).limit(1))
-        if has_any_event is not None:
-            return
-
-        db.add_all(
-            [
-                Event(
-                    id="evt_001",
-                    title="NUS-ISS Career Sharing",
-                    start_time=datetime(2026, 3, 5, 19, 0, tzinfo=timezone.utc),
-                    location="LT19",
-                    capacity=100,
-                    status="OPEN",
-                ),
-                Event(
-                    id="evt_002",
-                    title="Python FastAPI Workshop",
-                    start_time=datetime(2026, 3, 10, 14, 0, tzinfo=timezone.utc),
-                    location="Online",
-                    capacity=200,
-                    status="OPEN",
-                ),
-            ]
-        )
+        db.execute(insert(Event.__table__).prefix_with("IGNORE", dialect="mysql"), SEED_EVENTS)
         db.commit()
     finally:
         db.close()
 
 
-# Purpose: Initialize schema and seed startup data.
-@app.on_event("startup")
-# Purpose: Run startup hooks for DB schema creation and seed data.
-def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
+# Purpose: Let sync endpoints run as many worker threads as the DB pool can serve.
+def configure_threadpool() -> None:
+    limiter = to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+
+@asynccontextmanager
+# Purpose: Run startup hooks for threadpool sizing, DB schema creation and seed data.
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    del app
+    configure_threadpool()
+    if DB_AUTO_CREATE:
+        Base.metadata.create_all(bind=engine)
     seed_events()
+    yield
+
 
+app = FastAPI(title="Event Bot API", lifespan=lifespan)
 
 app.include_router(events_router)
 app.include_router(registration_router)
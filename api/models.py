@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from api.db import Base
@@ -31,12 +31,14 @@ class Registration(Base):
     )
 
     registration_id: Mapped[str] = mapped_column(String(64), primary_key=True)
-    event_id: Mapped[str] = mapped_column(ForeignKey("events.id"), nullable=False, index=True)
-    telegram_user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    event_id: Mapped[str] = mapped_column(ForeignKey("events.id"), nullable=False)
+    telegram_user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     full_name: Mapped[str] = mapped_column(String(120), nullable=False)
     email: Mapped[str] = mapped_column(String(180), nullable=False)
     phone: Mapped[str] = mapped_column(String(40), nullable=False)
-    qr_token: Mapped[str | None] = mapped_column(Text, nullable=True)
+    qr_token: Mapped[str | None] = mapped_column(
+        String(128), nullable=True, unique=True, index=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, default=utcnow
     )
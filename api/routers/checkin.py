@@ -2,9 +2,8 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from api.db import get_db
@@ -401,11 +400,22 @@ CHECKIN_GUI_HTML = """
 </html>
 """
 
+CHECKIN_GUI_BYTES = CHECKIN_GUI_HTML.encode("utf-8")
+CHECKIN_GUI_HEADERS = {"cache-control": "public, max-age=3600"}
+
 
 class CheckInScanIn(BaseModel):
     event_id: str = Field(min_length=1)
     qr_token: str = Field(min_length=1)
-    method: str = Field(default="qr_scan", min_length=1, max_length=40)
+    method: str = Field(default="qr_scan", max_length=40)
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    @field_validator("method")
+    @classmethod
+    # Purpose: Fall back to the default check-in method when none is given.
+    def default_method(cls, value: str) -> str:
+        return value or "qr_scan"
 
 
 class CheckInScanOut(BaseModel):
@@ -420,76 +430,82 @@ class CheckInScanOut(BaseModel):
 # Purpose: Serve a browser-based QR scanner UI for on-site check-in staff.
 @router.get("/gui", response_class=HTMLResponse)
 def checkin_gui() -> HTMLResponse:
-    return HTMLResponse(content=CHECKIN_GUI_HTML)
+    return HTMLResponse(content=CHECKIN_GUI_BYTES, headers=CHECKIN_GUI_HEADERS)
 
 
 # Purpose: Validate QR token and mark attendee as checked in once.
 @router.post("/scan", response_model=CheckInScanOut)
-def scan_check_in(payload: CheckInScanIn, db: Session = Depends(get_db)) -> CheckInScanOut:
-    event_id = payload.event_id.strip()
-    qr_token = payload.qr_token.strip()
-    method = payload.method.strip() or "qr_scan"
-
-    if not event_id:
-        raise HTTPException(status_code=400, detail="event_id is required")
-    if not qr_token:
-        raise HTTPException(status_code=400, detail="qr_token is required")
-
-    event = db.get(Event, event_id)
-    if event is None:
-        raise HTTPException(status_code=400, detail="Unknown event_id")
-
-    registration = db.scalar(select(Registration).where(Registration.qr_token == qr_token))
-    if registration is None:
-        raise HTTPException(status_code=404, detail="Invalid QR token")
-
-    if registration.event_id != event_id:
+def scan_check_in(
+    payload: CheckInScanIn,
+    db: Session = Depends(get_db, scope="function"),
+) -> CheckInScanOut:
+    event_id = payload.event_id
+    qr_token = payload.qr_token
+    method = payload.method
+
+    row = db.execute(
+        select(Registration, CheckIn.checked_in_at)
+        .outerjoin(CheckIn, CheckIn.registration_id == Registration.registration_id)
+        .where(Registration.qr_token == qr_token)
+    ).first()
+    registration, existing_at = row if row is not None else (None, None)
+
+    if registration is None or registration.event_id != event_id:
+        # Only the error path pays for the extra event lookup.
+        if db.get(Event, event_id) is None:
+            raise HTTPException(status_code=400, detail="Unknown event_id")
+        if registration is None:
+            raise HTTPException(status_code=404, detail="Invalid QR token")
         raise HTTPException(status_code=400, detail="QR token does not belong to this event")
 
-    existing = db.scalar(
-        select(CheckIn).where(CheckIn.registration_id == registration.registration_id)
-    )
-    if existing is not None:
+    if existing_at is not None:
         return CheckInScanOut(
             status="already_checked_in",
             message="Guest already checked in",
             registration_id=registration.registration_id,
             event_id=registration.event_id,
             full_name=registration.full_name,
-            checked_in_at=existing.checked_in_at,
+            checked_in_at=existing_at,
         )
 
-    check_in = CheckIn(
-        registration_id=registration.registration_id,
-        event_id=registration.event_id,
-        method=method,
-        checked_in_at=utcnow(),
+    # Read response fields before commit expires the loaded registration.
+    registration_id = registration.registration_id
+    full_name = registration.full_name
+
+    # INSERT IGNORE lets a concurrent duplicate scan fall through without an exception.
+    checked_in_at = utcnow()
+    result = db.execute(
+        insert(CheckIn)
+        .prefix_with("IGNORE", dialect="mysql")
+        .values(
+            registration_id=registration_id,
+            event_id=event_id,
+            method=method,
+            checked_in_at=checked_in_at,
+        )
     )
-    db.add(check_in)
-    try:
-        db.commit()
-    except IntegrityError as exc:
-        db.rollback()
-        duplicate = db.scalar(
-            select(CheckIn).where(CheckIn.registration_id == registration.registration_id)
+    db.commit()
+
+    if result.rowcount == 0:
+        duplicate_at = db.scalar(
+            select(CheckIn.checked_in_at).where(CheckIn.registration_id == registration_id)
         )
-        if duplicate is not None:
-            return CheckInScanOut(
-                status="already_checked_in",
-                message="Guest already checked in",
-                registration_id=registration.registration_id,
-                event_id=registration.event_id,
-                full_name=registration.full_name,
-                checked_in_at=duplicate.checked_in_at,
-            )
-        raise HTTPException(status_code=409, detail="Could not create check-in record") from exc
-
-    db.refresh(check_in)
+        if duplicate_at is None:
+            raise HTTPException(status_code=409, detail="Could not create check-in record")
+        return CheckInScanOut(
+            status="already_checked_in",
+            message="Guest already checked in",
+            registration_id=registration_id,
+            event_id=event_id,
+            full_name=full_name,
+            checked_in_at=duplicate_at,
+        )
+
     return CheckInScanOut(
         status="checked_in",
         message="Check-in successful",
-        registration_id=registration.registration_id,
-        event_id=registration.event_id,
-        full_name=registration.full_name,
-        checked_in_at=check_in.checked_in_at,
+        registration_id=registration_id,
+        event_id=event_id,
+        full_name=full_name,
+        checked_in_at=checked_in_at,
     )
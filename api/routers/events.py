@@ -1,7 +1,11 @@
+from collections import OrderedDict
 from datetime import datetime
+import hashlib
+import threading
+import time
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel, ConfigDict
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -10,6 +14,9 @@ from api.models import Event
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+EVENTS_CACHE_TTL_SECONDS = 10.0
+EVENTS_CACHE_MAX_ENTRIES = 8
+
 
 class EventOut(BaseModel):
     id: str
@@ -22,13 +29,67 @@ class EventOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-@router.get("", response_model=list[EventOut])
-# Purpose: Return events filtered by status for bot and clients.
-def list_events(status: str = "OPEN", db: Session = Depends(get_db)) -> list[EventOut]:
-    stmt = select(Event)
+EVENT_LIST_ADAPTER = TypeAdapter(list[EventOut])
+
+# status -> (loaded_at monotonic seconds, JSON body, ETag), least recently used first.
+# Bounded so arbitrary ?status= values cannot grow process memory.
+_events_cache: OrderedDict[str, tuple[float, bytes, str]] = OrderedDict()
+_events_cache_lock = threading.Lock()
+
+
+# Purpose: Query events for a status filter and serialize them to JSON bytes.
+def _load_events_body(db: Session, status: str) -> bytes:
+    stmt = select(
+        Event.id,
+        Event.title,
+        Event.start_time,
+        Event.location,
+        Event.capacity,
+        Event.status,
+    )
     if status:
         stmt = stmt.where(Event.status == status)
     stmt = stmt.order_by(Event.start_time.asc())
 
-    rows = db.scalars(stmt).all()
-    return [EventOut.model_validate(row) for row in rows]
+    rows = db.execute(stmt).all()
+    events = EVENT_LIST_ADAPTER.validate_python(rows, from_attributes=True)
+    return EVENT_LIST_ADAPTER.dump_json(events)
+
+
+# Purpose: Check an If-None-Match header (weak comparison) against the current ETag.
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@router.get("", response_model=list[EventOut])
+# Purpose: Return events filtered by status for bot and clients.
+def list_events(
+    request: Request,
+    status: str = "OPEN",
+    db: Session = Depends(get_db, scope="function"),
+) -> Response:
+    now = time.monotonic()
+    with _events_cache_lock:
+        cached = _events_cache.get(status)
+        if cached is not None:
+            _events_cache.move_to_end(status)
+    if cached is None or now - cached[0] >= EVENTS_CACHE_TTL_SECONDS:
+        body = _load_events_body(db, status)
+        cached = (now, body, f'"{hashlib.sha1(body).hexdigest()}"')
+        with _events_cache_lock:
+            _events_cache[status] = cached
+            _events_cache.move_to_end(status)
+            while len(_events_cache) > EVENTS_CACHE_MAX_ENTRIES:
+                _events_cache.popitem(last=False)
+
+    _, body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": f"max-age={int(EVENTS_CACHE_TTL_SECONDS)}"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,27 +1,32 @@
-from datetime import datetime, timezone
+from datetime import datetime
 import re
 import secrets
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, Field, field_validator
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, field_validator
+from sqlalchemy import or_, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from api.db import get_db
-from api.models import Event, Registration
+from api.models import Event, Registration, utcnow
 
 router = APIRouter(prefix="/registrations", tags=["registrations"])
 
-EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
-PHONE_PATTERN = re.compile(r"^\+?[0-9()\-\s]{7,20}$")
+EMAIL_REGEX = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+PHONE_REGEX = r"^\+?[0-9()\-\s]{7,20}$"
+NON_DIGIT_PATTERN = re.compile(r"\D", re.ASCII)
+EMAIL_MAX_LENGTH = 254
+PHONE_MAX_LENGTH = 21
+REGISTRATION_ID_ATTEMPTS = 3
 
 
 # Purpose: Normalize phone text into a canonical comparable value.
 def _normalize_phone(phone: str) -> str:
     cleaned = phone.strip()
     has_plus = cleaned.startswith("+")
-    digits = "".join(char for char in cleaned if char.isdigit())
+    digits = NON_DIGIT_PATTERN.sub("", cleaned)
     return f"+{digits}" if has_plus else digits
 
 
@@ -37,30 +42,30 @@ def _constraint_error_detail(exc: IntegrityError) -> str:
     return "Registration data conflicts with an existing attendee"
 
 
+# Purpose: Detect primary key collisions on a freshly generated registration id.
+def _is_registration_id_collision(exc: IntegrityError) -> bool:
+    message = str(exc.orig)
+    return "PRIMARY" in message or "registrations.registration_id" in message
+
+
 class RegistrationUpsertIn(BaseModel):
     event_id: str = Field(min_length=1)
     telegram_user_id: int
     full_name: str = Field(min_length=2, max_length=120)
-    email: str
-    phone: str
+    # Length and pattern checks run inside pydantic-core, before any Python code.
+    email: Annotated[
+        str,
+        StringConstraints(to_lower=True, max_length=EMAIL_MAX_LENGTH, pattern=EMAIL_REGEX),
+    ]
+    phone: str = Field(max_length=PHONE_MAX_LENGTH, pattern=PHONE_REGEX)
 
-    @field_validator("email")
-    @classmethod
-    # Purpose: Validate and normalize email input for registrations.
-    def validate_email(cls, value: str) -> str:
-        email = value.strip().lower()
-        if not EMAIL_PATTERN.fullmatch(email):
-            raise ValueError("Invalid email format")
-        return email
+    model_config = ConfigDict(str_strip_whitespace=True)
 
     @field_validator("phone")
     @classmethod
-    # Purpose: Validate and normalize phone input for registrations.
+    # Purpose: Normalize the already pattern-checked phone input for registrations.
     def validate_phone(cls, value: str) -> str:
-        phone = value.strip()
-        if not PHONE_PATTERN.fullmatch(phone):
-            raise ValueError("Invalid phone format")
-        normalized = _normalize_phone(phone)
+        normalized = _normalize_phone(value)
         digit_count = len(normalized.lstrip("+"))
         if digit_count < 7 or digit_count > 20:
             raise ValueError("Invalid phone format")
@@ -72,6 +77,12 @@ class RegistrationUpsertOut(BaseModel):
     status: str
 
 
+class RegistrationUpsertQROut(BaseModel):
+    registration_id: str
+    status: str
+    qr_token: str
+
+
 class RegistrationOut(BaseModel):
     registration_id: str
     event_id: str
@@ -88,9 +99,10 @@ class RegistrationQRResponse(BaseModel):
     qr_token: str
 
 
-# Purpose: Return the current UTC timestamp for record metadata.
-def _utcnow() -> datetime:
-    return datetime.now(timezone.utc)
+# Purpose: Serialize a server-built response model without FastAPI re-validating it.
+# Callers pass model_construct() instances; fields come from validated input or the DB.
+def _json_response(model: BaseModel) -> Response:
+    return Response(content=model.model_dump_json(), media_type="application/json")
 
 
 # Purpose: Generate a unique registration identifier.
@@ -98,35 +110,43 @@ def _new_registration_id() -> str:
     return f"reg_{secrets.token_hex(6)}"
 
 
-@router.post("", response_model=RegistrationUpsertOut)
-# Purpose: Create or update a registration for an event and Telegram user.
-def upsert_registration(
+# Purpose: Generate an unguessable QR token bound to a registration.
+def _new_qr_token(registration_id: str) -> str:
+    return f"qr_{registration_id}_{secrets.token_urlsafe(16)}"
+
+
+# Purpose: Create or update a registration, optionally minting its QR token in the same write.
+def _save_registration(
     payload: RegistrationUpsertIn,
-    db: Session = Depends(get_db),
-) -> RegistrationUpsertOut:
+    db: Session,
+    *,
+    with_qr: bool,
+) -> tuple[str, str, str | None]:
     event = db.get(Event, payload.event_id)
     if event is None:
         raise HTTPException(status_code=400, detail="Unknown event_id")
 
-    existing_by_user = db.scalar(
-        select(Registration).where(
-            Registration.event_id == payload.event_id,
-            Registration.telegram_user_id == payload.telegram_user_id,
-        )
-    )
-
-    email_match = db.scalar(
-        select(Registration).where(
-            Registration.event_id == payload.event_id,
-            Registration.email == payload.email,
-        )
-    )
-    phone_match = db.scalar(
+    candidates = db.scalars(
         select(Registration).where(
             Registration.event_id == payload.event_id,
-            Registration.phone == payload.phone,
+            or_(
+                Registration.telegram_user_id == payload.telegram_user_id,
+                Registration.email == payload.email,
+                Registration.phone == payload.phone,
+            ),
         )
-    )
+    ).all()
+
+    existing_by_user = None
+    email_match = None
+    phone_match = None
+    for candidate in candidates:
+        if candidate.telegram_user_id == payload.telegram_user_id:
+            existing_by_user = candidate
+        if candidate.email == payload.email:
+            email_match = candidate
+        if candidate.phone == payload.phone:
+            phone_match = candidate
 
     if existing_by_user is not None:
         if email_match is not None and email_match.registration_id != existing_by_user.registration_id:
@@ -139,74 +159,131 @@ def upsert_registration(
         if phone_match is not None:
             raise HTTPException(status_code=409, detail="Phone already registered for this event")
 
-    now = _utcnow()
+    now = utcnow()
 
     if existing_by_user is not None:
-        existing_by_user.full_name = payload.full_name.strip()
-        existing_by_user.email = payload.email
-        existing_by_user.phone = payload.phone
-        existing_by_user.updated_at = now
+        registration_id = existing_by_user.registration_id
+        qr_token = existing_by_user.qr_token
+        values = {
+            "full_name": payload.full_name,
+            "email": payload.email,
+            "phone": payload.phone,
+            "updated_at": now,
+        }
+        if with_qr and not qr_token:
+            qr_token = _new_qr_token(registration_id)
+            values["qr_token"] = qr_token
         try:
+            db.execute(
+                update(Registration)
+                .where(Registration.registration_id == registration_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
             db.commit()
         except IntegrityError as exc:
             db.rollback()
             raise HTTPException(status_code=409, detail=_constraint_error_detail(exc)) from exc
-        return RegistrationUpsertOut(registration_id=existing_by_user.registration_id, status="updated")
+        return registration_id, "updated", qr_token
 
     registration_id = _new_registration_id()
-    while db.get(Registration, registration_id) is not None:
-        registration_id = _new_registration_id()
-
+    qr_token = _new_qr_token(registration_id) if with_qr else None
     row = Registration(
         registration_id=registration_id,
         event_id=payload.event_id,
         telegram_user_id=payload.telegram_user_id,
-        full_name=payload.full_name.strip(),
+        full_name=payload.full_name,
         email=payload.email,
         phone=payload.phone,
         created_at=now,
         updated_at=now,
-        qr_token=None,
+        qr_token=qr_token,
+    )
+    for attempt in range(REGISTRATION_ID_ATTEMPTS):
+        db.add(row)
+        try:
+            db.commit()
+            break
+        except IntegrityError as exc:
+            db.rollback()
+            if attempt + 1 < REGISTRATION_ID_ATTEMPTS and _is_registration_id_collision(exc):
+                registration_id = _new_registration_id()
+                row.registration_id = registration_id
+                if with_qr:
+                    qr_token = _new_qr_token(registration_id)
+                    row.qr_token = qr_token
+                continue
+            raise HTTPException(status_code=409, detail=_constraint_error_detail(exc)) from exc
+
+    return registration_id, "created", qr_token
+
+
+@router.post("", response_model=RegistrationUpsertOut)
+# Purpose: Create or update a registration for an event and Telegram user.
+def upsert_registration(
+    payload: RegistrationUpsertIn,
+    db: Session = Depends(get_db, scope="function"),
+) -> Response:
+    registration_id, status, _ = _save_registration(payload, db, with_qr=False)
+    return _json_response(
+        RegistrationUpsertOut.model_construct(registration_id=registration_id, status=status)
     )
-    db.add(row)
-    try:
-        db.commit()
-    except IntegrityError as exc:
-        db.rollback()
-        raise HTTPException(status_code=409, detail=_constraint_error_detail(exc)) from exc
 
-    return RegistrationUpsertOut(registration_id=registration_id, status="created")
+
+@router.post("/with-qr", response_model=RegistrationUpsertQROut)
+# Purpose: Create or update a registration and return its QR token in one round trip.
+def upsert_registration_with_qr(
+    payload: RegistrationUpsertIn,
+    db: Session = Depends(get_db, scope="function"),
+) -> Response:
+    registration_id, status, qr_token = _save_registration(payload, db, with_qr=True)
+    return _json_response(
+        RegistrationUpsertQROut.model_construct(
+            registration_id=registration_id, status=status, qr_token=qr_token
+        )
+    )
 
 
 @router.get("/{registration_id}", response_model=RegistrationOut)
 # Purpose: Return one registration by its identifier.
-def get_registration(registration_id: str, db: Session = Depends(get_db)) -> RegistrationOut:
+def get_registration(
+    registration_id: str,
+    db: Session = Depends(get_db, scope="function"),
+) -> Response:
     row = db.get(Registration, registration_id)
     if row is None:
         raise HTTPException(status_code=404, detail="Registration not found")
 
-    return RegistrationOut(
-        registration_id=row.registration_id,
-        event_id=row.event_id,
-        telegram_user_id=row.telegram_user_id,
-        full_name=row.full_name,
-        email=row.email,
-        phone=row.phone,
-        created_at=row.created_at,
-        updated_at=row.updated_at,
+    return _json_response(
+        RegistrationOut.model_construct(
+            registration_id=row.registration_id,
+            event_id=row.event_id,
+            telegram_user_id=row.telegram_user_id,
+            full_name=row.full_name,
+            email=row.email,
+            phone=row.phone,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+        )
     )
 
 
 @router.post("/{registration_id}/qr", response_model=RegistrationQRResponse)
 # Purpose: Generate and return a stable QR token for a registration.
-def generate_qr(registration_id: str, db: Session = Depends(get_db)) -> RegistrationQRResponse:
+def generate_qr(
+    registration_id: str,
+    db: Session = Depends(get_db, scope="function"),
+) -> Response:
     row = db.get(Registration, registration_id)
     if row is None:
         raise HTTPException(status_code=404, detail="Registration not found")
 
     if not row.qr_token:
-        row.qr_token = f"qr_{registration_id}_{secrets.token_urlsafe(16)}"
-        row.updated_at = _utcnow()
-        db.commit()
+        row.qr_token = _new_qr_token(registration_id)
+        row.updated_at = utcnow()
 
-    return RegistrationQRResponse(registration_id=row.registration_id, qr_token=row.qr_token)
+    return _json_response(
+        RegistrationQRResponse.model_construct(
+            registration_id=row.registration_id, qr_token=row.qr_token
+        )
+    )
@@ -1,8 +1,19 @@
 from dataclasses import dataclass
+from typing import Any
+
 import httpx
+import orjson
 from bot.config import API_BASE_URL
 
-@dataclass
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+# Purpose: Signal that the event list could not be loaded from the API, for any reason.
+class EventsFetchError(Exception):
+    pass
+
+
+@dataclass(slots=True)
 class Event:
     id: str
     title: str
@@ -11,32 +22,73 @@ class Event:
     capacity: str
     status: str
 
-@dataclass
+@dataclass(slots=True)
 class RegistrationUpsertResult:
     registration_id: str
     status: str  # created | updated
 
-@dataclass
+@dataclass(slots=True)
 class RegistrationQRResult:
     registration_id: str
     qr_token: str
 
+@dataclass(slots=True)
+class RegistrationUpsertQRResult:
+    registration_id: str
+    status: str  # created | updated
+    qr_token: str
+
 
 class ApiClient:
     # Purpose: Initialize API client configuration for backend calls.
     def __init__(self,base_url: str = API_BASE_URL,timeout:float =10.0):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        
+        self._client: httpx.AsyncClient | None = None
+
+    # Purpose: Return the shared keep-alive HTTP client, creating it on first use.
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    # Purpose: Close pooled backend connections on bot shutdown.
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     # Purpose: Fetch event list from API and map rows to Event models.
     async def list_events(self, status:str = "OPEN") -> list[Event]:
-        url = f"{self.base_url}/events"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url, params={"status":status})
+        response = await self._http().get("/events", params={"status":status})
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         return [Event(**row) for row in data]
-    
+
+    # Purpose: Fetch raw event rows from the API for menu rendering and pickers.
+    async def list_event_rows(self, status: str = "OPEN") -> list[dict[str, Any]]:
+        try:
+            response = await self._http().get("/events", params={"status": status})
+        except httpx.RequestError as exc:
+            raise EventsFetchError("Events API is unreachable") from exc
+        if response.status_code >= 400:
+            raise EventsFetchError(f"Events API returned HTTP {response.status_code}")
+        if response.headers.get("content-length") == "2":
+            # "[]": no events for this status, nothing to decode.
+            return []
+
+        try:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError as exc:
+            raise EventsFetchError("Events API returned invalid JSON") from exc
+        if not isinstance(data, list):
+            return []
+        return [row for row in data if isinstance(row, dict)]
+
     # Purpose: Create or update a user registration through the API.
     async def upsert_registration(
         self,
@@ -47,7 +99,6 @@ class ApiClient:
         email: str,
         phone: str,
     ) -> RegistrationUpsertResult:
-        url = f"{self.base_url}/registrations"
         payload = {
             "event_id": event_id,
             "telegram_user_id": telegram_user_id,
@@ -55,17 +106,67 @@ class ApiClient:
             "email": email,
             "phone": phone,
         }
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(url, json=payload)
+        response = await self._http().post(
+            "/registrations", content=orjson.dumps(payload), headers=JSON_HEADERS
+        )
         response.raise_for_status()
-        return RegistrationUpsertResult(**response.json())
+
+        data = orjson.loads(response.content)
+        registration_id = data.get("registration_id") if isinstance(data, dict) else None
+        if not isinstance(registration_id, str) or not registration_id.strip():
+            raise ValueError("registration_id missing in API response")
+        return RegistrationUpsertResult(
+            registration_id=registration_id.strip(),
+            status=str(data.get("status", "")),
+        )
 
     # Purpose: Request QR token generation for a registration.
     async def generate_registration_qr(self, registration_id: str) -> RegistrationQRResult:
-        url = f"{self.base_url}/registrations/{registration_id}/qr"
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(url)
+        response = await self._http().post(f"/registrations/{registration_id}/qr")
         response.raise_for_status()
-        return RegistrationQRResult(**response.json())
 
-        
+        data = orjson.loads(response.content)
+        qr_token = data.get("qr_token") if isinstance(data, dict) else None
+        if not isinstance(qr_token, str) or not qr_token.strip():
+            raise ValueError("qr_token missing in API response")
+        return RegistrationQRResult(registration_id=registration_id, qr_token=qr_token.strip())
+
+    # Purpose: Create or update a registration and receive its QR token in one API call.
+    async def upsert_registration_with_qr(
+        self,
+        *,
+        event_id: str,
+        telegram_user_id: int,
+        full_name: str,
+        email: str,
+        phone: str,
+    ) -> RegistrationUpsertQRResult:
+        payload = {
+            "event_id": event_id,
+            "telegram_user_id": telegram_user_id,
+            "full_name": full_name,
+            "email": email,
+            "phone": phone,
+        }
+        response = await self._http().post(
+            "/registrations/with-qr", content=orjson.dumps(payload), headers=JSON_HEADERS
+        )
+        response.raise_for_status()
+
+        data = orjson.loads(response.content)
+        if not isinstance(data, dict):
+            raise ValueError("Unexpected API response for registration")
+        registration_id = data.get("registration_id")
+        qr_token = data.get("qr_token")
+        if not isinstance(registration_id, str) or not registration_id.strip():
+            raise ValueError("registration_id missing in API response")
+        if not isinstance(qr_token, str) or not qr_token.strip():
+            raise ValueError("qr_token missing in API response")
+        return RegistrationUpsertQRResult(
+            registration_id=registration_id.strip(),
+            status=str(data.get("status", "")),
+            qr_token=qr_token.strip(),
+        )
+
+
+api_client = ApiClient()
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+from functools import lru_cache
 import io
 import re
 from typing import Any
 
 import httpx
+from PIL import Image, ImageColor
 import qrcode
 from qrcode.constants import ERROR_CORRECT_H
-from telegram import InputFile, ReplyKeyboardRemove, Update
+from telegram import InputFile, ReplyKeyboardMarkup, ReplyKeyboardRemove, Update
 from telegram.ext import (
     CommandHandler,
     ContextTypes,
@@ -16,7 +19,7 @@ from telegram.ext import (
     filters,
 )
 
-from bot.config import API_BASE_URL
+from bot.api_client import EventsFetchError, api_client
 from bot.handlers.start import fetch_events
 from bot.keyboards import (
     BTN_BACK_MENU,
@@ -28,40 +31,43 @@ from bot.keyboards import (
     main_menu_keyboard,
 )
 from bot.states import REG_CONFIRM, REG_EMAIL, REG_EVENT, REG_NAME, REG_PHONE
-
-_EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
-_PHONE_PATTERN = re.compile(r"^[0-9+()\-\s]{7,20}$")
-
-REGISTRATIONS_ENDPOINT = f"{API_BASE_URL.rstrip('/')}/registrations"
-HTTP_TIMEOUT_SECONDS = 10.0
+from bot.validators import is_valid_email, is_valid_phone
 
 QR_FILL_COLOR = "#0F172A"
 QR_BACK_COLOR = "#E6FFFA"
+QR_BOX_SIZE = 12
+QR_PNG_CACHE_SIZE = 256
+# Two-entry palette: index 0 is the background, index 1 the modules.
+QR_PALETTE = [*ImageColor.getrgb(QR_BACK_COLOR), *ImageColor.getrgb(QR_FILL_COLOR)]
+
+REGISTER_FILTER = filters.Regex(f"^{re.escape(BTN_REGISTER)}$")
+CONFIRM_FILTER = filters.Regex(f"(?i)^{re.escape(BTN_CONFIRM)}$")
+CANCEL_FILTER = filters.Regex(f"(?i)^{re.escape(BTN_CANCEL)}$")
+TEXT_INPUT_FILTER = filters.TEXT & ~filters.COMMAND
+
+# All registration scratch state lives under this one user_data key.
+REGISTRATION_DATA_KEY = "registration"
+
+
+# Purpose: Return the per-user scratch dict holding in-progress registration data.
+def _registration_data(context: ContextTypes.DEFAULT_TYPE) -> dict[str, Any]:
+    return context.user_data.setdefault(REGISTRATION_DATA_KEY, {})
 
 
 # Purpose: Clear temporary registration data from user conversation state.
 def _clear_registration_data(context: ContextTypes.DEFAULT_TYPE) -> None:
-    for key in (
-        "event_options",
-        "selected_event_id",
-        "selected_event_title",
-        "reg_name",
-        "reg_email",
-        "reg_phone",
-    ):
-        context.user_data.pop(key, None)
+    context.user_data.pop(REGISTRATION_DATA_KEY, None)
 
 
 # Purpose: Build a label-to-event lookup from API event rows.
 def _build_event_options(events: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
     options: dict[str, dict[str, Any]] = {}
     for event in events:
-        event_id = str(event.get("id", "")).strip()
         title = str(event.get("title", "Untitled Event")).strip()
-        location = str(event.get("location", "TBA")).strip()
-        label = f"{title} ({location})"
+        label = f"{title} ({str(event.get('location', 'TBA')).strip()})"
         if label in options:
-            label = f"{title} [{event_id}]"
+            # Only duplicate labels need the event id to disambiguate.
+            label = f"{title} [{str(event.get('id', '')).strip()}]"
         options[label] = event
     return options
 
@@ -79,61 +85,29 @@ def _extract_api_error(exc: httpx.HTTPStatusError) -> str:
     return "Request failed"
 
 
-# Purpose: Create or update a registration via the backend API.
-async def _upsert_registration(
-    *,
-    event_id: str,
-    telegram_user_id: int,
-    full_name: str,
-    email: str,
-    phone: str,
-) -> str:
-    payload = {
-        "event_id": event_id,
-        "telegram_user_id": telegram_user_id,
-        "full_name": full_name,
-        "email": email,
-        "phone": phone,
-    }
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
-        response = await client.post(REGISTRATIONS_ENDPOINT, json=payload)
-    response.raise_for_status()
-
-    data = response.json()
-    registration_id = data.get("registration_id") if isinstance(data, dict) else None
-    if not isinstance(registration_id, str) or not registration_id.strip():
-        raise ValueError("registration_id missing in API response")
-    return registration_id.strip()
-
-
-# Purpose: Request QR token creation for a registration from the API.
-async def _generate_qr_token(registration_id: str) -> str:
-    url = f"{REGISTRATIONS_ENDPOINT}/{registration_id}/qr"
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
-        response = await client.post(url)
-    response.raise_for_status()
-
-    data = response.json()
-    qr_token = data.get("qr_token") if isinstance(data, dict) else None
-    if not isinstance(qr_token, str) or not qr_token.strip():
-        raise ValueError("qr_token missing in API response")
-    return qr_token.strip()
-
-
-# Purpose: Generate a styled QR PNG image from a QR token string.
+@lru_cache(maxsize=QR_PNG_CACHE_SIZE)
+# Purpose: Generate a styled QR PNG image from a QR token string, memoized per token.
 def _build_styled_qr_png(qr_token: str) -> bytes:
     qr = qrcode.QRCode(
         version=None,
         error_correction=ERROR_CORRECT_H,
-        box_size=12,
+        box_size=QR_BOX_SIZE,
         border=2,
     )
     qr.add_data(qr_token)
     qr.make(fit=True)
 
-    image = qr.make_image(fill_color=QR_FILL_COLOR, back_color=QR_BACK_COLOR)
+    # Paint one pixel per module into a 2-colour palette image, then scale up;
+    # this yields a 1-bit PNG that looks identical to the RGB render.
+    matrix = qr.get_matrix()
+    size = len(matrix)
+    image = Image.new("P", (size, size))
+    image.putpalette(QR_PALETTE)
+    image.putdata([1 if module else 0 for row in matrix for module in row])
+    image = image.resize((size * QR_BOX_SIZE, size * QR_BOX_SIZE), Image.Resampling.NEAREST)
+
     buffer = io.BytesIO()
-    image.save(buffer, format="PNG")
+    image.save(buffer, format="PNG", optimize=True, bits=1)
     return buffer.getvalue()
 
 
@@ -146,7 +120,7 @@ async def register_entry(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
     try:
         events = await fetch_events()
-    except (httpx.RequestError, httpx.HTTPStatusError, ValueError):
+    except EventsFetchError:
         await update.message.reply_text(
             "I could not load events from the API. Please try again soon.",
             reply_markup=main_menu_keyboard(),
@@ -161,11 +135,14 @@ async def register_entry(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return ConversationHandler.END
 
     options = _build_event_options(events)
-    context.user_data["event_options"] = options
+    keyboard = event_picker_keyboard(tuple(options))
+    data = _registration_data(context)
+    data["event_options"] = options
+    data["event_keyboard"] = keyboard
 
     await update.message.reply_text(
         "Choose an event to register:",
-        reply_markup=event_picker_keyboard(list(options.keys())),
+        reply_markup=keyboard,
     )
     return REG_EVENT
 
@@ -187,12 +164,17 @@ async def select_event(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         )
         return ConversationHandler.END
 
-    options = context.user_data.get("event_options")
+    data = _registration_data(context)
+    options = data.get("event_options")
+    keyboard = data.get("event_keyboard")
+    if not isinstance(keyboard, ReplyKeyboardMarkup):
+        labels = tuple(options) if isinstance(options, dict) else ()
+        keyboard = event_picker_keyboard(labels)
+
     if not isinstance(options, dict) or choice not in options:
-        labels = list(options.keys()) if isinstance(options, dict) else []
         await update.message.reply_text(
             "Please choose an event from the buttons.",
-            reply_markup=event_picker_keyboard(labels),
+            reply_markup=keyboard,
         )
         return REG_EVENT
 
@@ -202,12 +184,12 @@ async def select_event(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
     if not selected_event_id:
         await update.message.reply_text(
             "This event is invalid. Please choose another event.",
-            reply_markup=event_picker_keyboard(list(options.keys())),
+            reply_markup=keyboard,
         )
         return REG_EVENT
 
-    context.user_data["selected_event_id"] = selected_event_id
-    context.user_data["selected_event_title"] = selected_event_title
+    data["selected_event_id"] = selected_event_id
+    data["selected_event_title"] = selected_event_title
 
     await update.message.reply_text(
         f"Great, you selected: {selected_event_title}\nWhat is your full name?",
@@ -226,7 +208,7 @@ async def collect_name(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
         await update.message.reply_text("Please enter a valid name.")
         return REG_NAME
 
-    context.user_data["reg_name"] = name
+    _registration_data(context)["reg_name"] = name
     await update.message.reply_text("Thanks. What is your email address?")
     return REG_EMAIL
 
@@ -237,11 +219,11 @@ async def collect_email(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
         return REG_EMAIL
 
     email = update.message.text.strip()
-    if not _EMAIL_PATTERN.fullmatch(email):
+    if not is_valid_email(email):
         await update.message.reply_text("That email looks invalid. Please enter a valid email.")
         return REG_EMAIL
 
-    context.user_data["reg_email"] = email
+    _registration_data(context)["reg_email"] = email
     await update.message.reply_text("Got it. What is your phone number?")
     return REG_PHONE
 
@@ -252,15 +234,16 @@ async def collect_phone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
         return REG_PHONE
 
     phone = update.message.text.strip()
-    if not _PHONE_PATTERN.fullmatch(phone):
+    if not is_valid_phone(phone):
         await update.message.reply_text("Please enter a valid phone number.")
         return REG_PHONE
 
-    context.user_data["reg_phone"] = phone
+    data = _registration_data(context)
+    data["reg_phone"] = phone
 
-    event_title = str(context.user_data.get("selected_event_title", "Untitled Event"))
-    name = str(context.user_data.get("reg_name", ""))
-    email = str(context.user_data.get("reg_email", ""))
+    event_title = str(data.get("selected_event_title", "Untitled Event"))
+    name = str(data.get("reg_name", ""))
+    email = str(data.get("reg_email", ""))
     summary = (
         "Please confirm your registration details:\n\n"
         f"Event: {event_title}\n"
@@ -280,11 +263,12 @@ async def confirm_registration(update: Update, context: ContextTypes.DEFAULT_TYP
         return ConversationHandler.END
 
     user = update.effective_user
-    event_id = str(context.user_data.get("selected_event_id", "")).strip()
-    event_title = str(context.user_data.get("selected_event_title", "Untitled Event")).strip()
-    full_name = str(context.user_data.get("reg_name", "")).strip()
-    email = str(context.user_data.get("reg_email", "")).strip()
-    phone = str(context.user_data.get("reg_phone", "")).strip()
+    data = _registration_data(context)
+    event_id = str(data.get("selected_event_id", "")).strip()
+    event_title = str(data.get("selected_event_title", "Untitled Event")).strip()
+    full_name = str(data.get("reg_name", "")).strip()
+    email = str(data.get("reg_email", "")).strip()
+    phone = str(data.get("reg_phone", "")).strip()
 
     if user is None or not event_id or not full_name or not email or not phone:
         _clear_registration_data(context)
@@ -295,14 +279,15 @@ async def confirm_registration(update: Update, context: ContextTypes.DEFAULT_TYP
         return ConversationHandler.END
 
     try:
-        registration_id = await _upsert_registration(
+        registration = await api_client.upsert_registration_with_qr(
             event_id=event_id,
             telegram_user_id=user.id,
             full_name=full_name,
             email=email,
             phone=phone,
         )
-        qr_token = await _generate_qr_token(registration_id)
+        registration_id = registration.registration_id
+        qr_token = registration.qr_token
     except httpx.HTTPStatusError as exc:
         _clear_registration_data(context)
         await update.message.reply_text(
@@ -327,9 +312,9 @@ async def confirm_registration(update: Update, context: ContextTypes.DEFAULT_TYP
     )
 
     try:
-        qr_png = _build_styled_qr_png(qr_token)
+        qr_png = await asyncio.to_thread(_build_styled_qr_png, qr_token)
         await update.message.reply_photo(
-            photo=InputFile(io.BytesIO(qr_png), filename=f"{registration_id}.png"),
+            photo=InputFile(qr_png, filename=f"{registration_id}.png"),
             caption=caption,
             reply_markup=main_menu_keyboard(),
         )
@@ -367,28 +352,25 @@ async def invalid_confirm_choice(update: Update, context: ContextTypes.DEFAULT_T
 
 # Purpose: Build the full registration conversation handler graph.
 def get_register_conversation_handler() -> ConversationHandler:
-    cancel_regex = re.escape(BTN_CANCEL)
-    confirm_regex = re.escape(BTN_CONFIRM)
-
     return ConversationHandler(
         entry_points=[
-            MessageHandler(filters.Regex(f"^{re.escape(BTN_REGISTER)}$"), register_entry),
+            MessageHandler(REGISTER_FILTER, register_entry),
             CommandHandler("register", register_entry),
         ],
         states={
-            REG_EVENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, select_event)],
-            REG_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, collect_name)],
-            REG_EMAIL: [MessageHandler(filters.TEXT & ~filters.COMMAND, collect_email)],
-            REG_PHONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, collect_phone)],
+            REG_EVENT: [MessageHandler(TEXT_INPUT_FILTER, select_event)],
+            REG_NAME: [MessageHandler(TEXT_INPUT_FILTER, collect_name)],
+            REG_EMAIL: [MessageHandler(TEXT_INPUT_FILTER, collect_email)],
+            REG_PHONE: [MessageHandler(TEXT_INPUT_FILTER, collect_phone)],
             REG_CONFIRM: [
-                MessageHandler(filters.Regex(f"(?i)^{confirm_regex}$"), confirm_registration),
-                MessageHandler(filters.Regex(f"(?i)^{cancel_regex}$"), cancel_registration),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, invalid_confirm_choice),
+                MessageHandler(CONFIRM_FILTER, confirm_registration),
+                MessageHandler(CANCEL_FILTER, cancel_registration),
+                MessageHandler(TEXT_INPUT_FILTER, invalid_confirm_choice),
             ],
         },
         fallbacks=[
             CommandHandler("cancel", cancel_registration),
-            MessageHandler(filters.Regex(f"(?i)^{cancel_regex}$"), cancel_registration),
+            MessageHandler(CANCEL_FILTER, cancel_registration),
         ],
         allow_reentry=True,
     )
@@ -1,55 +1,112 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
+from functools import lru_cache
 import re
+import time
 from typing import Any
 
-import httpx
 from telegram import Update
 from telegram.ext import CommandHandler, ContextTypes, MessageHandler, filters
 
-from bot.config import API_BASE_URL
+from bot.api_client import EventsFetchError, api_client
+from bot.config import EVENTS_CACHE_TTL
 from bot.keyboards import BTN_HELP, BTN_REGISTER, BTN_VIEW_EVENTS, main_menu_keyboard
 
-EVENTS_ENDPOINT = f"{API_BASE_URL.rstrip('/')}/events"
-HTTP_TIMEOUT_SECONDS = 10.0
+START_TIME_LABEL_CACHE_SIZE = 512
+STALE_EVENTS_NOTICE = "Showing cached list - live API unavailable."
+HELP_TEXT = (
+    "How to use this bot:\n"
+    f"1) Tap {BTN_VIEW_EVENTS} to see current events\n"
+    f"2) Tap {BTN_REGISTER} to register for one event\n"
+    "3) Follow the prompts and confirm your details"
+)
+# Event dict key holding the pre-rendered "title | start | location" line.
+RENDERED_LINE_KEY = "_rendered_line"
 
+VIEW_EVENTS_FILTER = filters.Regex(f"^{re.escape(BTN_VIEW_EVENTS)}$")
+HELP_FILTER = filters.Regex(f"^{re.escape(BTN_HELP)}$")
 
-# Purpose: Fetch open events from the FastAPI backend.
-async def fetch_events(status: str = "OPEN") -> list[dict[str, Any]]:
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_SECONDS) as client:
-        response = await client.get(EVENTS_ENDPOINT, params={"status": status})
-    response.raise_for_status()
+# status -> (loaded_at monotonic seconds, events); entries are kept past the TTL so the
+# last good list can still be shown while the API is down.
+_events_cache: dict[str, tuple[float, list[dict[str, Any]]]] = {}
+# status -> refresh task that concurrent cache misses for that status all await.
+_events_refreshes: dict[str, asyncio.Task[list[dict[str, Any]]]] = {}
 
-    payload = response.json()
-    if not isinstance(payload, list):
-        return []
 
-    return [event for event in payload if isinstance(event, dict)]
+# Purpose: Return cached events for a status while they are still fresh.
+def _fresh_cached_events(status: str) -> list[dict[str, Any]] | None:
+    cached = _events_cache.get(status)
+    if cached is None or time.monotonic() - cached[0] >= EVENTS_CACHE_TTL:
+        return None
+    return cached[1]
 
 
-# Purpose: Convert an ISO timestamp into a readable label.
-def _format_start_time(start_time: Any) -> str:
-    if not isinstance(start_time, str) or not start_time:
-        return "TBD"
+# Purpose: Return the last successfully fetched events for a status, however old.
+def _last_known_events(status: str) -> list[dict[str, Any]] | None:
+    cached = _events_cache.get(status)
+    return cached[1] if cached is not None else None
+
 
-    normalized = start_time.replace("Z", "+00:00")
+# Purpose: Load events for a status from the API and store them in the cache.
+async def _refresh_events(status: str) -> list[dict[str, Any]]:
+    events = await api_client.list_event_rows(status)
+    for event in events:
+        event[RENDERED_LINE_KEY] = _render_event_line(event)
+    _events_cache[status] = (time.monotonic(), events)
+    return events
+
+
+# Purpose: Fetch open events from the FastAPI backend, shared across chats for a short TTL.
+async def fetch_events(status: str = "OPEN") -> list[dict[str, Any]]:
+    events = _fresh_cached_events(status)
+    if events is not None:
+        return events
+
+    # Single-flight per status: concurrent misses share one in-flight API call.
+    refresh = _events_refreshes.get(status)
+    if refresh is None:
+        refresh = asyncio.ensure_future(_refresh_events(status))
+        _events_refreshes[status] = refresh
+        refresh.add_done_callback(lambda _: _events_refreshes.pop(status, None))
+    # Shielded so one cancelled caller cannot cancel the refresh others are awaiting.
+    return await asyncio.shield(refresh)
+
+
+@lru_cache(maxsize=START_TIME_LABEL_CACHE_SIZE)
+# Purpose: Format one ISO timestamp string, memoized since cached event lists repeat them.
+def _format_iso_timestamp(start_time: str) -> str:
     try:
-        parsed = datetime.fromisoformat(normalized)
+        # Python 3.11+ parses a trailing "Z" natively, so no rewrite is needed.
+        parsed = datetime.fromisoformat(start_time)
         return parsed.strftime("%d %b %Y, %I:%M %p")
     except ValueError:
         return start_time
 
 
-# Purpose: Render event list text for the chat response.
+# Purpose: Convert an ISO timestamp into a readable label.
+def _format_start_time(start_time: Any) -> str:
+    if not isinstance(start_time, str) or not start_time:
+        return "TBD"
+    return _format_iso_timestamp(start_time)
+
+
+# Purpose: Render one event's list line without its position number.
+def _render_event_line(event: dict[str, Any]) -> str:
+    return (
+        f"{event.get('title', 'Untitled Event')} | "
+        f"{_format_start_time(event.get('start_time'))} | {event.get('location', 'TBA')}"
+    )
+
+
+# Purpose: Render event list text for the chat response from pre-rendered event lines.
 def _render_events(events: list[dict[str, Any]]) -> str:
-    lines = ["Available events:"]
-    for index, event in enumerate(events, start=1):
-        title = str(event.get("title", "Untitled Event"))
-        location = str(event.get("location", "TBA"))
-        start_label = _format_start_time(event.get("start_time"))
-        lines.append(f"{index}. {title} | {start_label} | {location}")
-    return "\n".join(lines)
+    lines = [
+        f"{index}. {event.get(RENDERED_LINE_KEY) or _render_event_line(event)}"
+        for index, event in enumerate(events, start=1)
+    ]
+    return "\n".join(["Available events:", *lines])
 
 
 # Purpose: Handle /start and show the main menu keyboard.
@@ -72,7 +129,15 @@ async def view_events_message(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     try:
         events = await fetch_events()
-    except (httpx.RequestError, httpx.HTTPStatusError, ValueError):
+    except EventsFetchError:
+        stale_events = _last_known_events("OPEN")
+        if stale_events:
+            await update.message.reply_text(
+                f"{STALE_EVENTS_NOTICE}\n\n{_render_events(stale_events)}",
+                reply_markup=main_menu_keyboard(),
+            )
+            return
+
         await update.message.reply_text(
             "I could not load events from the API right now. Please try again shortly.",
             reply_markup=main_menu_keyboard(),
@@ -98,30 +163,24 @@ async def help_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if update.message is None:
         return
 
-    await update.message.reply_text(
-        "How to use this bot:\n"
-        f"1) Tap {BTN_VIEW_EVENTS} to see current events\n"
-        f"2) Tap {BTN_REGISTER} to register for one event\n"
-        "3) Follow the prompts and confirm your details",
-        reply_markup=main_menu_keyboard(),
-    )
+    await update.message.reply_text(HELP_TEXT, reply_markup=main_menu_keyboard())
 
 
 # Purpose: Return handler for the /start command.
 def get_start_handler() -> CommandHandler:
-    return CommandHandler("start", start_command)
+    return CommandHandler("start", start_command, block=False)
 
 
 # Purpose: Return handler for View Events menu button taps.
 def get_view_events_handler() -> MessageHandler:
-    return MessageHandler(filters.Regex(f"^{re.escape(BTN_VIEW_EVENTS)}$"), view_events_message)
+    return MessageHandler(VIEW_EVENTS_FILTER, view_events_message, block=False)
 
 
 # Purpose: Return handler for Help menu button taps.
 def get_help_handler() -> MessageHandler:
-    return MessageHandler(filters.Regex(f"^{re.escape(BTN_HELP)}$"), help_message)
+    return MessageHandler(HELP_FILTER, help_message, block=False)
 
 
 # Purpose: Return handler for the /help command.
 def get_help_command_handler() -> CommandHandler:
-    return CommandHandler("help", help_message)
+    return CommandHandler("help", help_message, block=False)
@@ -1,4 +1,4 @@
-from collections.abc import Sequence
+from functools import lru_cache
 
 from telegram import KeyboardButton, ReplyKeyboardMarkup
 
@@ -8,22 +8,32 @@ BTN_HELP = "Help"
 BTN_CONFIRM = "Confirm"
 BTN_CANCEL = "Cancel"
 BTN_BACK_MENU = "Back to Menu"
+EVENT_PICKER_CACHE_SIZE = 64
 
 
-# Purpose: Build the main menu keyboard shown to all users.
+MAIN_MENU_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(BTN_VIEW_EVENTS), KeyboardButton(BTN_REGISTER)],
+        [KeyboardButton(BTN_HELP)],
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False,
+)
+CONFIRM_CANCEL_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[[KeyboardButton(BTN_CONFIRM), KeyboardButton(BTN_CANCEL)]],
+    resize_keyboard=True,
+    one_time_keyboard=True,
+)
+
+
+# Purpose: Return the shared main menu keyboard shown to all users.
 def main_menu_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(BTN_VIEW_EVENTS), KeyboardButton(BTN_REGISTER)],
-            [KeyboardButton(BTN_HELP)],
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=False,
-    )
+    return MAIN_MENU_KEYBOARD
 
 
-# Purpose: Build an event picker keyboard from event label options.
-def event_picker_keyboard(event_labels: Sequence[str]) -> ReplyKeyboardMarkup:
+@lru_cache(maxsize=EVENT_PICKER_CACHE_SIZE)
+# Purpose: Build (or reuse) an event picker keyboard for a tuple of event labels.
+def event_picker_keyboard(event_labels: tuple[str, ...]) -> ReplyKeyboardMarkup:
     rows = [[KeyboardButton(label)] for label in event_labels]
     rows.append([KeyboardButton(BTN_CANCEL), KeyboardButton(BTN_BACK_MENU)])
     return ReplyKeyboardMarkup(
@@ -33,10 +43,6 @@ def event_picker_keyboard(event_labels: Sequence[str]) -> ReplyKeyboardMarkup:
     )
 
 
-# Purpose: Build the confirm or cancel keyboard for final confirmation.
+# Purpose: Return the shared confirm or cancel keyboard for final confirmation.
 def confirm_cancel_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(BTN_CONFIRM), KeyboardButton(BTN_CANCEL)]],
-        resize_keyboard=True,
-        one_time_keyboard=True,
-    )
+    return CONFIRM_CANCEL_KEYBOARD
@@ -1,8 +1,17 @@
+import asyncio
 import logging
 
-from telegram.ext import Application, CommandHandler
+from telegram.ext import AIORateLimiter, Application, CommandHandler
 
-from bot.config import BOT_TOKEN
+from bot.api_client import api_client
+from bot.config import (
+    BOT_TOKEN,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
 from bot.handlers.register import cancel_registration, get_register_conversation_handler
 from bot.handlers.start import (
     get_help_command_handler,
@@ -11,10 +20,54 @@ from bot.handlers.start import (
     get_view_events_handler,
 )
 
+# Outbound Bot API calls (sendMessage, sendPhoto, ...) get their own pool so the
+# long-lived getUpdates poll can never hold the slots replies need.
+BOT_CONNECTION_POOL_SIZE = 32
+BOT_POOL_TIMEOUT_SECONDS = 20.0
+GET_UPDATES_CONNECTION_POOL_SIZE = 4
+GET_UPDATES_POOL_TIMEOUT_SECONDS = 60.0
+GET_UPDATES_READ_TIMEOUT_SECONDS = 25.0
+
+# Stay just under Telegram's ~30 messages/second global cap; 429s are retried.
+RATE_LIMIT_MESSAGES_PER_SECOND = 28
+RATE_LIMIT_MAX_RETRIES = 3
+
+
+# Purpose: Release pooled backend API connections when the bot stops.
+async def close_api_client(application: Application) -> None:
+    del application
+    await api_client.aclose()
+
+
+# Purpose: Run the bot on uvloop's event loop where it is installed (not on Windows).
+def install_uvloop() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 
 # Purpose: Create and wire the Telegram bot application handlers.
 def build_application() -> Application:
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .connection_pool_size(BOT_CONNECTION_POOL_SIZE)
+        .pool_timeout(BOT_POOL_TIMEOUT_SECONDS)
+        .get_updates_connection_pool_size(GET_UPDATES_CONNECTION_POOL_SIZE)
+        .get_updates_pool_timeout(GET_UPDATES_POOL_TIMEOUT_SECONDS)
+        .get_updates_read_timeout(GET_UPDATES_READ_TIMEOUT_SECONDS)
+        .rate_limiter(
+            AIORateLimiter(
+                overall_max_rate=RATE_LIMIT_MESSAGES_PER_SECOND,
+                overall_time_period=1,
+                max_retries=RATE_LIMIT_MAX_RETRIES,
+            )
+        )
+        .post_shutdown(close_api_client)
+        .build()
+    )
 
     application.add_handler(get_start_handler())
     application.add_handler(get_help_command_handler())
@@ -26,7 +79,7 @@ def build_application() -> Application:
     return application
 
 
-# Purpose: Configure logging and start Telegram polling.
+# Purpose: Configure logging and start Telegram webhook or polling transport.
 def main() -> None:
     logging.basicConfig(
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -35,7 +88,20 @@ def main() -> None:
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
 
+    install_uvloop()
     application = build_application()
+    if WEBHOOK_URL:
+        # Telegram pushes updates to the public URL; a reverse proxy forwards them here.
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            drop_pending_updates=True,
+        )
+        return
+
     application.run_polling(drop_pending_updates=True)
 
 
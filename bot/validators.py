@@ -0,0 +1,23 @@
+import re
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+PHONE_PATTERN = re.compile(r"^[0-9+()\-\s]{7,20}$", re.ASCII)
+
+EMAIL_MIN_LENGTH = 3
+EMAIL_MAX_LENGTH = 254
+PHONE_MIN_LENGTH = 7
+PHONE_MAX_LENGTH = 20
+
+
+# Purpose: Check email shape, rejecting impossible lengths before running the regex.
+def is_valid_email(email: str) -> bool:
+    if not EMAIL_MIN_LENGTH <= len(email) <= EMAIL_MAX_LENGTH or "@" not in email:
+        return False
+    return EMAIL_PATTERN.fullmatch(email) is not None
+
+
+# Purpose: Check phone shape, rejecting impossible lengths before running the regex.
+def is_valid_phone(phone: str) -> bool:
+    if not PHONE_MIN_LENGTH <= len(phone) <= PHONE_MAX_LENGTH:
+        return False
+    return PHONE_PATTERN.fullmatch(phone) is not None
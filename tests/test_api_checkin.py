@@ -1,23 +1,12 @@
-import uuid
+import asyncio
+from collections.abc import Callable
 
 from fastapi.testclient import TestClient
+import httpx
 
 from api.main import app
 
 
-# Purpose: Provide an API test client that runs startup hooks.
-def _client() -> TestClient:
-    return TestClient(app)
-
-
-# Purpose: Generate a unique contact pair for registration setup.
-def _unique_contact() -> tuple[str, str]:
-    suffix = uuid.uuid4().hex[:10]
-    email = f"checkin.{suffix}@example.com"
-    phone = f"+65{int(suffix, 16) % 100_000_000:08d}"
-    return email, phone
-
-
 # Purpose: Return seeded event ids used for check-in tests.
 def _event_ids(client: TestClient) -> list[str]:
     response = client.get("/events")
@@ -28,13 +17,18 @@ def _event_ids(client: TestClient) -> list[str]:
 
 
 # Purpose: Create a registration and return its id and qr token for scanning.
-def _create_registration_with_qr(client: TestClient, event_id: str) -> tuple[str, str]:
-    email, phone = _unique_contact()
+def _create_registration_with_qr(
+    client: TestClient,
+    event_id: str,
+    contact: tuple[str, str],
+    telegram_user_id: int,
+) -> tuple[str, str]:
+    email, phone = contact
     registration = client.post(
         "/registrations",
         json={
             "event_id": event_id,
-            "telegram_user_id": int(uuid.uuid4().int % 1_000_000_000),
+            "telegram_user_id": telegram_user_id,
             "full_name": "Check In User",
             "email": email,
             "phone": phone,
@@ -50,58 +44,112 @@ def _create_registration_with_qr(client: TestClient, event_id: str) -> tuple[str
     return registration_id, qr_token
 
 
+# Purpose: Create many registrations with QR tokens concurrently for bulk test setup.
+async def _bulk_create_registrations_with_qr(
+    event_id: str,
+    attendees: list[tuple[tuple[str, str], int]],
+) -> list[tuple[str, str]]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        # Purpose: Create one registration and return its id and qr token.
+        async def create(contact: tuple[str, str], telegram_user_id: int) -> tuple[str, str]:
+            email, phone = contact
+            response = await async_client.post(
+                "/registrations/with-qr",
+                json={
+                    "event_id": event_id,
+                    "telegram_user_id": telegram_user_id,
+                    "full_name": "Bulk Check In User",
+                    "email": email,
+                    "phone": phone,
+                },
+            )
+            assert response.status_code == 200, response.text
+            payload = response.json()
+            return payload["registration_id"], payload["qr_token"]
+
+        return await asyncio.gather(*(create(contact, user_id) for contact, user_id in attendees))
+
+
 # Purpose: Verify check-in GUI page is served for on-site staff usage.
-def test_checkin_gui_page_loads() -> None:
-    with _client() as client:
-        response = client.get("/checkins/gui")
-        assert response.status_code == 200, response.text
-        assert "Guest Check-in Console" in response.text
-        assert "/checkins/scan" in response.text
+def test_checkin_gui_page_loads(client: TestClient) -> None:
+    response = client.get("/checkins/gui")
+    assert response.status_code == 200, response.text
+    assert "Guest Check-in Console" in response.text
+    assert "/checkins/scan" in response.text
 
 
 # Purpose: Verify first scan checks in and duplicate scan is idempotent.
-def test_checkin_scan_success_and_duplicate() -> None:
-    with _client() as client:
-        event_id = _event_ids(client)[0]
-        registration_id, qr_token = _create_registration_with_qr(client, event_id)
-
-        first_scan = client.post(
-            "/checkins/scan",
-            json={"event_id": event_id, "qr_token": qr_token, "method": "web_scanner"},
-        )
-        assert first_scan.status_code == 200, first_scan.text
-        first_payload = first_scan.json()
-        assert first_payload["status"] == "checked_in"
-        assert first_payload["registration_id"] == registration_id
+def test_checkin_scan_success_and_duplicate(
+    client: TestClient,
+    unique_contact: Callable[[], tuple[str, str]],
+    unique_telegram_user_id: Callable[[], int],
+) -> None:
+    event_id = _event_ids(client)[0]
+    registration_id, qr_token = _create_registration_with_qr(
+        client, event_id, unique_contact(), unique_telegram_user_id()
+    )
 
-        second_scan = client.post(
-            "/checkins/scan",
-            json={"event_id": event_id, "qr_token": qr_token, "method": "web_scanner"},
-        )
-        assert second_scan.status_code == 200, second_scan.text
-        second_payload = second_scan.json()
-        assert second_payload["status"] == "already_checked_in"
-        assert second_payload["registration_id"] == registration_id
+    first_scan = client.post(
+        "/checkins/scan",
+        json={"event_id": event_id, "qr_token": qr_token, "method": "web_scanner"},
+    )
+    assert first_scan.status_code == 200, first_scan.text
+    first_payload = first_scan.json()
+    assert first_payload["status"] == "checked_in"
+    assert first_payload["registration_id"] == registration_id
+
+    second_scan = client.post(
+        "/checkins/scan",
+        json={"event_id": event_id, "qr_token": qr_token, "method": "web_scanner"},
+    )
+    assert second_scan.status_code == 200, second_scan.text
+    second_payload = second_scan.json()
+    assert second_payload["status"] == "already_checked_in"
+    assert second_payload["registration_id"] == registration_id
 
 
 # Purpose: Verify invalid or wrong-event QR scans return clear errors.
-def test_checkin_scan_rejects_invalid_or_wrong_event_qr() -> None:
-    with _client() as client:
-        event_ids = _event_ids(client)
-        event_id = event_ids[0]
-        _, qr_token = _create_registration_with_qr(client, event_id)
+def test_checkin_scan_rejects_invalid_or_wrong_event_qr(
+    client: TestClient,
+    unique_contact: Callable[[], tuple[str, str]],
+    unique_telegram_user_id: Callable[[], int],
+) -> None:
+    event_ids = _event_ids(client)
+    event_id = event_ids[0]
+    _, qr_token = _create_registration_with_qr(
+        client, event_id, unique_contact(), unique_telegram_user_id()
+    )
+
+    invalid_scan = client.post(
+        "/checkins/scan",
+        json={"event_id": event_id, "qr_token": "invalid_qr_token"},
+    )
+    assert invalid_scan.status_code == 404, invalid_scan.text
+    assert invalid_scan.json().get("detail") == "Invalid QR token"
 
-        invalid_scan = client.post(
+    if len(event_ids) > 1:
+        wrong_event_scan = client.post(
             "/checkins/scan",
-            json={"event_id": event_id, "qr_token": "invalid_qr_token"},
+            json={"event_id": event_ids[1], "qr_token": qr_token},
         )
-        assert invalid_scan.status_code == 404, invalid_scan.text
-        assert invalid_scan.json().get("detail") == "Invalid QR token"
-
-        if len(event_ids) > 1:
-            wrong_event_scan = client.post(
-                "/checkins/scan",
-                json={"event_id": event_ids[1], "qr_token": qr_token},
-            )
-            assert wrong_event_scan.status_code == 400, wrong_event_scan.text
-            assert wrong_event_scan.json().get("detail") == "QR token does not belong to this event"
+        assert wrong_event_scan.status_code == 400, wrong_event_scan.text
+        assert wrong_event_scan.json().get("detail") == "QR token does not belong to this event"
+
+
+# Purpose: Verify registrations created concurrently can each be checked in once.
+def test_checkin_scan_after_concurrent_bulk_setup(
+    client: TestClient,
+    unique_contact: Callable[[], tuple[str, str]],
+    unique_telegram_user_id: Callable[[], int],
+) -> None:
+    event_id = _event_ids(client)[0]
+    attendees = [(unique_contact(), unique_telegram_user_id()) for _ in range(5)]
+    created = asyncio.run(_bulk_create_registrations_with_qr(event_id, attendees))
+    assert len({registration_id for registration_id, _ in created}) == len(attendees)
+
+    for registration_id, qr_token in created:
+        scan = client.post("/checkins/scan", json={"event_id": event_id, "qr_token": qr_token})
+        assert scan.status_code == 200, scan.text
+        assert scan.json()["status"] == "checked_in"
+        assert scan.json()["registration_id"] == registration_id